@@ -1,6 +1,6 @@
 import requests
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 import math
 import pandas as pd
 import json
@@ -123,13 +123,191 @@ def format_schedule_info(schedule):
     
     return "\n".join(info)
 
+REQUIRED_COLUMNS = ["Project", "Batch_Name", "Day", "Start_Time", "Duration"]
+VALIDATION_CACHE_FILE = os.getenv("MP_BATCH_VALIDATION_CACHE", "mp_batch_plan.validation.json")
+# Bump when the validation rules change so stale cached results are discarded
+VALIDATION_CACHE_VERSION = 1
+
+# Precompiled parsers shared by validation and calendar rendering
+# "11:00", "11:00:00", "2024-01-15 11:00:00"
+START_TIME_PATTERN = re.compile(r"^\s*(?:\d{4}-\d{2}-\d{2}[ T])?(\d{1,2}):(\d{2})(?::(\d{2})(?:\.\d+)?)?\s*$")
+# "01:00:00", "1:30", "1 day, 2:00:00", "1 days 02:00:00"
+DURATION_PATTERN = re.compile(r"^\s*(?:(\d+) days?,?\s*)?(\d+):(\d{2})(?::(\d{2})(?:\.\d+)?)?\s*$")
+DAY_NAMES = {
+    "Sun": "Sunday", "Mon": "Monday", "Tue": "Tuesday", "Wed": "Wednesday",
+    "Thu": "Thursday", "Fri": "Friday", "Sat": "Saturday"
+}
+DAY_TOKENS = {**DAY_NAMES, **{full: full for full in DAY_NAMES.values()}}
+# Excel stores durations of 24h or more as datetimes counted from this epoch
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+def _is_blank(value):
+    return value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NaT
+
+def parse_start_time(value):
+    """Parse a Start_Time cell into a datetime.time, or return None if it is not a valid time."""
+    if _is_blank(value):
+        return None
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    match = START_TIME_PATTERN.match(str(value))
+    if not match:
+        return None
+    hour, minute, second = int(match.group(1)), int(match.group(2)), int(match.group(3) or 0)
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    return time(hour, minute, second)
+
+def parse_duration(value):
+    """Parse a Duration cell into whole minutes, or return None if it is not a valid duration.
+
+    Blank durations count as 0 minutes, matching how the calendar has always treated them.
+    """
+    if _is_blank(value):
+        return 0
+    if isinstance(value, timedelta):
+        return int(value.total_seconds()) // 60
+    if isinstance(value, datetime):
+        return int((value - EXCEL_EPOCH).total_seconds()) // 60
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    match = DURATION_PATTERN.match(str(value))
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(g or 0) for g in match.groups())
+    if minutes > 59 or seconds > 59:
+        return None
+    return days * 24 * 60 + hours * 60 + minutes + seconds // 60
+
+def parse_days(value):
+    """Split a Day cell into full day names. Returns (days, unknown_tokens)."""
+    day_raw = "" if _is_blank(value) else str(value)
+    days = []
+    unknown = []
+    for day_part in day_raw.split(','):
+        day_part = day_part.strip()
+        if not day_part:
+            continue
+        day = DAY_TOKENS.get(day_part)
+        if day is None:
+            unknown.append(day_part)
+        elif day not in days:
+            days.append(day)
+    return days, unknown
+
+def _validate_row(row):
+    """Check a single plan row. Returns (errors, warnings) as lists of issue dicts."""
+    errors = []
+    warnings = []
+
+    def issue(column, message):
+        return {"column": column, "value": str(row[column]), "message": message}
+
+    for col in ("Project", "Batch_Name"):
+        if _is_blank(row[col]) or not str(row[col]).strip():
+            errors.append(issue(col, f"{col} is empty"))
+    days, unknown = parse_days(row["Day"])
+    if unknown:
+        errors.append(issue("Day", f"Unknown day token(s): {', '.join(repr(t) for t in unknown)}"))
+    elif not days:
+        errors.append(issue("Day", "No days given"))
+    if parse_start_time(row["Start_Time"]) is None:
+        errors.append(issue("Start_Time", "Start_Time is not a valid HH:MM[:SS] time"))
+    duration_minutes = parse_duration(row["Duration"])
+    if duration_minutes is None:
+        errors.append(issue("Duration", "Duration is not a valid HH:MM[:SS] duration"))
+    elif duration_minutes > 24 * 60:
+        warnings.append(issue("Duration", "Duration is longer than 24 hours"))
+    elif _is_blank(row["Duration"]):
+        warnings.append(issue("Duration", "Duration is empty, treating as 0 minutes"))
+    return errors, warnings
+
+def _load_validation_cache(cache_path):
+    """Load cached per-row validation results keyed by row hash."""
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable validation cache {cache_path}: {e}")
+        return {}
+    if data.get("version") != VALIDATION_CACHE_VERSION:
+        return {}
+    return data.get("rows", {})
+
+def _save_validation_cache(cache_path, rows):
+    try:
+        with open(cache_path, "w") as f:
+            json.dump({"version": VALIDATION_CACHE_VERSION, "rows": rows}, f)
+    except OSError as e:
+        print(f"Could not write validation cache {cache_path}: {e}")
+
+def validate_batch_schedule(df, cache_path=VALIDATION_CACHE_FILE):
+    """Validate the plan before rendering and return a single report.
+
+    Rows are hashed and only rows whose hash is not in the cache from the last run are
+    parsed again, so re-validating an unchanged plan is just a hash and a dict lookup per row.
+    Plan-wide checks (duplicate batches) are vectorized and run every time.
+
+    The report is a dict with:
+      - errors / warnings: lists of {"row", "column", "value", "message"}
+      - valid_rows: index labels of rows without errors (safe to render)
+      - total_rows / checked_rows: plan size and how many rows were actually re-parsed
+    """
+    report = {"errors": [], "warnings": [], "valid_rows": [], "total_rows": len(df), "checked_rows": 0}
+    if df.empty:
+        return report
+
+    row_hashes = pd.util.hash_pandas_object(df[REQUIRED_COLUMNS], index=False).astype(str)
+    cached = _load_validation_cache(cache_path)
+    changed = ~row_hashes.isin(list(cached))
+    results = {h: cached[h] for h in set(row_hashes[~changed])}
+    for idx, row in df.loc[changed.to_numpy(), REQUIRED_COLUMNS].iterrows():
+        errors, warnings = _validate_row(row)
+        results[row_hashes[idx]] = {"errors": errors, "warnings": warnings}
+        report["checked_rows"] += 1
+
+    for idx, row_hash in zip(df.index, row_hashes):
+        result = results[row_hash]
+        report["errors"].extend({"row": idx, **e} for e in result["errors"])
+        report["warnings"].extend({"row": idx, **w} for w in result["warnings"])
+        if not result["errors"]:
+            report["valid_rows"].append(idx)
+
+    duplicate_cols = ["Project", "Batch_Name", "Day", "Start_Time"]
+    duplicates = df.duplicated(subset=duplicate_cols, keep="first")
+    for idx in df.index[duplicates.to_numpy()]:
+        report["warnings"].append({
+            "row": idx,
+            "column": "Batch_Name",
+            "value": str(df.at[idx, "Batch_Name"]),
+            "message": "Duplicate batch (same Project, Batch_Name, Day and Start_Time as an earlier row)",
+        })
+
+    # Store only hashes of the current plan so the cache does not grow across edits
+    if cache_path and (report["checked_rows"] or len(results) != len(cached)):
+        _save_validation_cache(cache_path, results)
+    return report
+
+def print_validation_report(report):
+    """Print the validation report produced by validate_batch_schedule."""
+    print("\n=== Batch Plan Validation ===")
+    print(f"Rows: {report['total_rows']} (re-checked: {report['checked_rows']}), "
+          f"valid: {len(report['valid_rows'])}, "
+          f"errors: {len(report['errors'])}, warnings: {len(report['warnings'])}")
+    for level, issues in (("ERROR", report["errors"]), ("WARNING", report["warnings"])):
+        for item in issues:
+            print(f"  [{level}] row {item['row']} {item['column']}='{item['value']}': {item['message']}")
+
 def read_excel_schedule(file_path="mp_batch_plan.xlsx"):
     """Read the batch schedule from the Excel file and return as a DataFrame."""
     try:
         df = pd.read_excel(file_path)
         # Ensure required columns exist
-        required_cols = ["Project", "Batch_Name", "Day", "Start_Time", "Duration"]
-        for col in required_cols:
+        for col in REQUIRED_COLUMNS:
             if col not in df.columns:
                 raise ValueError(f"Missing required column: {col}")
         return df
@@ -167,46 +345,31 @@ def print_batch_schedule_calendar(df):
     next_dates = get_next_week_dates()  # e.g., {"Monday": date, ...}
     valid_days = set(next_dates.keys())
 
-    short_to_full_day = {
-        "Sun": "Sunday", "Mon": "Monday", "Tue": "Tuesday", "Wed": "Wednesday",
-        "Thu": "Thursday", "Fri": "Friday", "Sat": "Saturday"
-    }
-    
     for idx, row in df.iterrows():
-        project = row["Project"]
         batch_name = row["Batch_Name"]
-        day_raw = str(row["Day"]) if row["Day"] is not None else ""
         start_time = row["Start_Time"]
-        for day_part in day_raw.split(','):
-            day_part = day_part.strip()
-            day = short_to_full_day.get(day_part, day_part)
+        # Rows are checked by validate_batch_schedule before rendering; anything that
+        # still fails to parse here is skipped
+        days, _ = parse_days(row["Day"])
+        t = parse_start_time(start_time)
+        duration_minutes = parse_duration(row["Duration"])
+        if t is None or duration_minutes is None:
+            continue
+        slot = t.hour * 2 + (1 if t.minute >= 30 else 0)
+        time_str = t.strftime('%H:%M')
+        duration_str = str(row["Duration"])
+        # Calculate how many slots to fill
+        start_minute = t.hour * 60 + t.minute
+        # The first slot may be partial, so we add the offset
+        minutes_in_first_slot = 30 - (start_minute % 30)
+        remaining_minutes = max(duration_minutes - minutes_in_first_slot, 0)
+        slots_to_fill = 1 + math.ceil(remaining_minutes / 30) if duration_minutes > 0 else 1
+        for day in days:
             if day not in valid_days:
                 print(f"[DEBUG] Skipping row {idx}: day '{day}' not in valid_days {valid_days}")
                 continue
             # Get column index for the day
-            day_short = day_name_to_short.get(day)
-            if day_short is None:
-                print(f"[DEBUG] Skipping row {idx}: day_short for '{day}' is None")
-                continue
-            col = short_to_col[day_short]
-            # Parse start time and find the slot
-            try:
-                t = pd.to_datetime(str(start_time)).time()
-                slot = t.hour * 2 + (1 if t.minute >= 30 else 0)
-                time_str = t.strftime('%H:%M')
-                # Parse duration
-                duration_str = str(row["Duration"]) if row["Duration"] is not None else "00:00:00"
-                h, m, s = [int(x) for x in duration_str.split(":")] if ":" in duration_str else (0, 0, 0)
-                duration_minutes = h * 60 + m + s // 60
-                # Calculate how many slots to fill
-                start_minute = t.hour * 60 + t.minute
-                # The first slot may be partial, so we add the offset
-                minutes_in_first_slot = 30 - (start_minute % 30)
-                remaining_minutes = max(duration_minutes - minutes_in_first_slot, 0)
-                slots_to_fill = 1 + math.ceil(remaining_minutes / 30) if duration_minutes > 0 else 1
-            except Exception as e:
-                print(f"[DEBUG] Skipping row {idx}: could not parse time/duration '{start_time}'/'{duration_str}' ({e})")
-                continue
+            col = short_to_col[day_name_to_short[day]]
             # Place batch name and time in the matrix for all slots covered by duration
             label = f"{batch_name} ({time_str})"
             for slot_offset in range(slots_to_fill):
@@ -429,6 +592,12 @@ def main_excel_calendar():
         return
     print("\n[DEBUG] Data read from Excel file:")
     print(df)
+    report = validate_batch_schedule(df)
+    print_validation_report(report)
+    df = df.loc[report["valid_rows"]]
+    if df.empty:
+        print("No valid schedule rows to render.")
+        return
     send_calendar_to_confluence(df)
 
 if __name__ == "__main__":